@@ -135,6 +135,12 @@ if [ -f "$STREAMSPACE_ROOT/scripts/generate-templates.py" ]; then
     echo "  ✓ generate-templates.py"
 fi
 
+# The generator imports the shared template core; copy it alongside
+if [ -f "$STREAMSPACE_ROOT/scripts/_template_core.py" ]; then
+    cp "$STREAMSPACE_ROOT/scripts/_template_core.py" "$TARGET_REPO/scripts/"
+    echo "  ✓ _template_core.py"
+fi
+
 # Create validation script
 echo ""
 echo "Creating validation script..."